@@ -1,51 +1,290 @@
+import asyncio
+import contextlib
 import logging
 import sys
 import os
-import json
-from typing import List, Dict
+import re
+import itertools
+import multiprocessing
+import multiprocessing.pool
 from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import AsyncIterator, List, Dict, Iterable, Iterator, Optional, Set, Tuple
 
-from ollama import chat
+import chromadb
+import ijson
+import numpy as np
 from config import AppConfig
-from services.chroma_db_handler import ChromaDBHandler
+from services.chroma_db_handler import ChromaDBHandler, content_id
+from services.embedding_cache import EmbeddingCache
+from services.ollama_client import OllamaClient
+from services.semantic_cache import SemanticCache
+from services.text_loader import load_text_file
+
+# Static instructions sent as the system message, so Ollama can reuse their KV cache across questions
+SYSTEM_PROMPT = (
+    "You are an AI Legal Counsel with expertise in Austrian law and all areas of law. "
+    "You provide precise, accurate legal analysis and advice based on the information provided. "
+    "\n\nAs legal counsel, you should:"
+    "\n- Analyze legal questions methodically and thoroughly"
+    "\n- Consider relevant statutes, case law, and legal principles from the provided context"
+    "\n- Reference specific law numbers and sections when citing Austrian laws"
+    "\n- Clearly distinguish between established legal facts and your professional opinion"
+    "\n- Include appropriate disclaimers about not providing formal legal advice"
+    "\n- Use proper legal terminology and citation formats when referencing legal sources"
+    "\n- Identify potential legal risks and considerations"
+    "\n- When citing Austrian laws, reference the specific BGBl numbers if available"
+)
+
+# Static parts of the user message, concatenated around the question and context
+PROMPT_HEAD = "Question: "
+PROMPT_MID = "\n\nRelevant Information: "
+PROMPT_TAIL = "\n\nProvide your analysis and advice:"
+
+# Number of uncached paragraphs embedded per model call during setup
+EMBED_BATCH_SIZE = 256
+
+# Number of documents read, embedded and stored together during setup
+INGEST_BATCH_SIZE = 1000
+
+# Matches the reasoning block some models (e.g. deepseek-r1) emit before the answer
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+
+class _ThinkTagFilter:
+    """Removes <think>...</think> spans from streamed text, holding back tags split across chunks."""
+
+    OPEN_TAG = '<think>'
+    CLOSE_TAG = '</think>'
+
+    def __init__(self):
+        self._buffer = ''
+        self._inside = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that is safe to emit."""
+        self._buffer += chunk
+        output = []
+        while True:
+            tag = self.CLOSE_TAG if self._inside else self.OPEN_TAG
+            index = self._buffer.find(tag)
+            if index == -1:
+                # Keep a trailing partial tag until the next chunk completes or rules it out
+                keep = next((k for k in range(min(len(tag) - 1, len(self._buffer)), 0, -1)
+                             if self._buffer.endswith(tag[:k])), 0)
+                split = len(self._buffer) - keep
+                if not self._inside:
+                    output.append(self._buffer[:split])
+                self._buffer = self._buffer[split:]
+                return ''.join(output)
+
+            if not self._inside:
+                output.append(self._buffer[:index])
+            self._buffer = self._buffer[index + len(tag):]
+            self._inside = not self._inside
+
+    def flush(self) -> str:
+        """Return whatever is left once the stream has ended."""
+        remainder = '' if self._inside else self._buffer
+        self._buffer = ''
+        return remainder
+
+
+# Number of processes used to parse text files during setup
+INGEST_WORKERS = int(os.environ.get("LEGALMIND_INGEST_WORKERS", max(1, (os.cpu_count() or 1) - 1)))
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
 
 
 class Application:
-    def __init__(self, config: AppConfig, chroma_db_handler: ChromaDBHandler):
+    def __init__(self, config: AppConfig, chroma_db_handler: ChromaDBHandler, read_only: bool = False):
         self.config = config
         self.chroma_db_handler = chroma_db_handler
-        self.collection = None
+        # Read-only instances (the web server) open the collection but never create it; setup is the only writer
+        self.read_only = read_only
+        self.semantic_cache = SemanticCache(dim=chroma_db_handler.model.get_sentence_embedding_dimension())
 
-    def _load_text_file(self, file_path: str) -> List[str]:
-        """Load content from a text file and return paragraphs as a list."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                # Split content into paragraphs
-                paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-                logging.info(f"Loaded {len(paragraphs)} paragraphs from {file_path}")
-                return paragraphs
-        except Exception as e:
-            logging.error(f"Error loading {file_path}: {e}")
-            return []
+    @cached_property
+    def ollama_client(self) -> OllamaClient:
+        """LLM client with its background loop thread, started on first use so setup never runs it."""
+        return OllamaClient(model=self.config.llm_model, options=self.config.llm_options)
+
+    @cached_property
+    def collection(self) -> chromadb.Collection:
+        """ChromaDB collection handle, fetched once per application instance."""
+        if self.read_only:
+            return self.chroma_db_handler.get_collection(self.config.chroma_collection_name)
+        return self.chroma_db_handler.get_or_create_collection(self.config.chroma_collection_name)
 
-    def _load_austrian_law_json(self, json_path: str) -> Dict:
-        """Load Austrian law data from JSON file created by the scraper."""
+    def check_embedding_model(self):
+        """Raise if the collection was embedded with another model than the configured one."""
+        stored_model = (self.collection.metadata or {}).get("embedding_model")
+        if stored_model != self.config.embedding_model:
+            db_dir = os.path.normpath(self.chroma_db_handler.get_path(self.config.chroma_path))
+            raise RuntimeError(
+                f"ChromaDB collection '{self.config.chroma_collection_name}' was embedded with "
+                f"{stored_model or 'an unknown model'}, but embedding_model is {self.config.embedding_model}; "
+                f"delete {db_dir} and run `python main.py setup` to rebuild it"
+            )
+
+    def _iter_text_files(
+            self,
+            pool: multiprocessing.pool.Pool,
+            text_files: List[str],
+            paragraph_ids: Set[str],
+            failed_sources: List[str]
+    ) -> Iterator[Tuple[str, Dict, str]]:
+        """Yield (document, metadata, id) entries for the paragraphs of all text files.
+
+        Adds the paragraph IDs to paragraph_ids and the files that could not be read to failed_sources.
+        """
+        # Paragraph splitting is pure Python, so parse files in separate processes rather than threads
+        for file_path, file_results in zip(text_files, pool.imap(load_text_file, text_files, chunksize=4)):
+            if file_results is None:
+                failed_sources.append(file_path)
+                continue
+
+            for paragraph in file_results:
+                paragraph_id = content_id(paragraph)
+                paragraph_ids.add(paragraph_id)
+                # Add simple metadata for text files
+                yield paragraph, {"source": "text_file", "type": "paragraph"}, paragraph_id
+
+    def _iter_austrian_law_json(self, json_path: str, failed_sources: List[str]) -> Iterator[Tuple[str, Dict, str]]:
+        """Stream (document, metadata, id) entries from the Austrian law JSON file created by the scraper.
+
+        Adds json_path to failed_sources if the file cannot be read completely.
+        """
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logging.info(f"Loaded Austrian law JSON with {len(data.get('documents', []))} documents")
-                return data
+            # The three parallel arrays are read through separate handles so the file is never fully loaded
+            with open(json_path, 'rb') as docs_file, open(json_path, 'rb') as metas_file, open(json_path, 'rb') as ids_file:
+                yield from zip(
+                    ijson.items(docs_file, 'documents.item'),
+                    ijson.items(metas_file, 'metadatas.item', use_float=True),
+                    ijson.items(ids_file, 'ids.item')
+                )
         except Exception as e:
             logging.error(f"Error loading Austrian law JSON {json_path}: {e}")
-            return {}
+            failed_sources.append(json_path)
+
+    def _embed_with_cache(self, cache: EmbeddingCache, documents: List[str], content_ids: List[str]) -> np.ndarray:
+        """Embed documents, reusing vectors cached on disk (keyed by content ID) from previous setups."""
+        hashes = [bytes.fromhex(cid) for cid in content_ids]
+        vectors = cache.get_many(hashes)
+
+        # Embed each distinct uncached paragraph once
+        misses = list({h: i for i, h in enumerate(hashes) if h not in vectors}.items())
+        logging.info(f"Embedding cache: {len(documents) - len(misses)} hits, {len(misses)} misses")
+
+        for start in range(0, len(misses), EMBED_BATCH_SIZE):
+            batch = misses[start:start + EMBED_BATCH_SIZE]
+            embedded = self.chroma_db_handler.embed([documents[i] for _, i in batch])
+            new_entries = [(h, vec) for (h, _), vec in zip(batch, embedded)]
+            cache.put_many(new_entries)
+            vectors.update(new_entries)
+
+        return np.stack([vectors[h] for h in hashes])
+
+    def _prepare_batch(self, cache: EmbeddingCache, batches: Iterator[List[Tuple]], skip_unchanged: bool) -> Optional[Tuple]:
+        """Read and embed the next batch of entries; returns None once all entries are consumed.
+
+        Returns the number of entries read together with the documents, metadatas, ids and embeddings to write.
+        """
+        batch = next(batches, None)
+        if batch is None:
+            return None
+
+        documents, metadatas, ids = (list(column) for column in zip(*batch))
+
+        # Content IDs key the embedding cache, stand in for missing document IDs and are stored
+        # with each entry, so later setups can tell whether the stored text is still current
+        content_ids = [content_id(document) for document in documents]
+        ids = [doc_id if doc_id is not None else cid for doc_id, cid in zip(ids, content_ids)]
+        metadatas = [{**(metadata or {}), "content_id": cid} for metadata, cid in zip(metadatas, content_ids)]
+
+        # Entries stored with the same content need neither embedding nor writing
+        if skip_unchanged:
+            stored = self.chroma_db_handler.stored_content_ids(self.collection, ids)
+            keep = [i for i, (doc_id, cid) in enumerate(zip(ids, content_ids)) if stored.get(doc_id) != cid]
+            if len(keep) < len(ids):
+                documents, metadatas, ids, content_ids = (
+                    [column[i] for i in keep] for column in (documents, metadatas, ids, content_ids)
+                )
+
+        embeddings = self._embed_with_cache(cache, documents, content_ids) if documents else None
+        return len(batch), documents, metadatas, ids, embeddings
+
+    async def _ingest(self, entries: Iterator[Tuple], write_documents, skip_unchanged: bool) -> int:
+        """Embed and store entries batch by batch, embedding the next batch while the previous one is written.
+
+        Returns the number of entries read, including those skipped because they were already up to date.
+        """
+        batches = _batched(entries, INGEST_BATCH_SIZE)
+        prepared: asyncio.Queue = asyncio.Queue(maxsize=2)
+        cache = self._open_embedding_cache()
+        loop = asyncio.get_running_loop()
+        # A dedicated thread for the embed stage, so shutting it down waits for a batch still being prepared
+        embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-embed")
+
+        async def embed_stage():
+            while (batch := await loop.run_in_executor(embed_executor, self._prepare_batch, cache, batches, skip_unchanged)) is not None:
+                await prepared.put(batch)
+            await prepared.put(None)
+
+        async def write_stage() -> int:
+            total_entries = total_written = 0
+            while (batch := await prepared.get()) is not None:
+                entry_count, documents, *columns = batch
+                if documents:
+                    await asyncio.to_thread(write_documents, self.collection, documents, *columns)
+                total_entries += entry_count
+                total_written += len(documents)
+                logging.info(f"Processed {total_entries} documents so far, {total_written} written to ChromaDB")
+            return total_entries
+
+        embed_task = asyncio.create_task(embed_stage())
+        write_task = asyncio.create_task(write_stage())
+        try:
+            _, total_entries = await asyncio.gather(embed_task, write_task)
+            return total_entries
+        finally:
+            # If one stage failed, stop the other instead of leaving it blocked on the queue
+            for task in (embed_task, write_task):
+                task.cancel()
+            await asyncio.gather(embed_task, write_task, return_exceptions=True)
+            await asyncio.to_thread(embed_executor.shutdown)
+            cache.close()
+
+    def _open_embedding_cache(self) -> EmbeddingCache:
+        db_dir = self.chroma_db_handler.get_path(self.config.chroma_path)
+        model_name = self.config.embedding_model.replace('/', '_')
+        return EmbeddingCache(os.path.join(db_dir, f"embedding_cache_{model_name}.sqlite"))
+
+    def _setup_marker_path(self) -> str:
+        return os.path.join(self.chroma_db_handler.get_path(self.config.chroma_path), "setup_done.marker")
 
     def runSetup(self):
         """Initialize database by loading text files from resources directory and storing content in ChromaDB."""
         resources_dir = "./resources"
 
+        try:
+            self.check_embedding_model()
+        except RuntimeError as e:
+            logging.error(str(e))
+            sys.exit(1)
+
+        marker_path = self._setup_marker_path()
+        if os.path.exists(marker_path) and self.collection.count() > 0:
+            logging.info(f"ChromaDB is already populated, skipping setup (delete {marker_path} to force re-ingestion)")
+            return
+
         # Load traditional text files
-        text_files = [os.path.join(resources_dir, f) for f in os.listdir(resources_dir) if f.endswith('.txt')]
+        with os.scandir(resources_dir) as entries:
+            text_files = [entry.path for entry in entries if entry.name.endswith('.txt') and entry.is_file()]
 
         # Check for Austrian law JSON file
         austrian_law_json = os.path.join(resources_dir, "austrian_laws_chromadb.json")
@@ -56,57 +295,70 @@ class Application:
 
         logging.info(f"Starting to load {len(text_files)} text files and checking for Austrian law data...")
 
-        vector_entries = []
-        metadatas = []
-        ids = []
-
-        # Load traditional text files (your existing method)
-        if text_files:
-            with ThreadPoolExecutor(max_workers=min(10, len(text_files))) as executor:
-                results = list(executor.map(self._load_text_file, text_files))
-                for file_results in results:
-                    vector_entries.extend(file_results)
-                    # Add simple metadata for text files
-                    metadatas.extend([{"source": "text_file", "type": "paragraph"} for _ in file_results])
-                    ids.extend([f"txt_{i}" for i in range(len(ids), len(ids) + len(file_results))])
-
-        # Load Austrian law JSON if it exists
-        if os.path.exists(austrian_law_json):
-            logging.info("Found Austrian law JSON file, loading structured law data...")
-            austrian_data = self._load_austrian_law_json(austrian_law_json)
-
-            if austrian_data:
-                # Add Austrian law documents with rich metadata
-                vector_entries.extend(austrian_data.get('documents', []))
-                metadatas.extend(austrian_data.get('metadatas', []))
-                ids.extend(austrian_data.get('ids', []))
-
-                logging.info(f"Added {len(austrian_data.get('documents', []))} Austrian law documents")
-
-        if not vector_entries:
+        # A fresh collection can be bulk-loaded with add, which skips Chroma's per-ID existence check;
+        # otherwise only new entries and entries whose text changed are embedded and upserted
+        fresh_collection = self.collection.count() == 0
+        if fresh_collection:
+            write_documents = self.chroma_db_handler.add_documents_with_metadata
+        else:
+            write_documents = self.chroma_db_handler.upsert_documents_with_metadata
+
+        with contextlib.ExitStack() as stack:
+            sources = []
+            paragraph_ids: Set[str] = set()
+            failed_sources: List[str] = []
+            if text_files:
+                # Fork the parsing processes here, before the ingest pipeline starts its event loop and threads
+                pool = stack.enter_context(multiprocessing.Pool(min(INGEST_WORKERS, len(text_files))))
+                sources.append(self._iter_text_files(pool, text_files, paragraph_ids, failed_sources))
+            if os.path.exists(austrian_law_json):
+                logging.info("Found Austrian law JSON file, streaming structured law data...")
+                sources.append(self._iter_austrian_law_json(austrian_law_json, failed_sources))
+
+            entries = itertools.chain.from_iterable(sources)
+            total_documents = asyncio.run(self._ingest(entries, write_documents, skip_unchanged=not fresh_collection))
+
+        if total_documents == 0:
             logging.error("No content was loaded from text files or Austrian law data. Exiting.")
             sys.exit(1)
 
-        logging.info(f"Loaded {len(vector_entries)} total documents. Adding to ChromaDB...")
-        self.collection = self.chroma_db_handler.get_or_create_collection(self.config.chroma_collection_name)
+        # A text file that failed to load contributed no paragraph IDs, so its stored paragraphs would look stale
+        if failed_sources:
+            logging.warning("Some sources failed to load, keeping paragraphs that were not seen in this run")
+        elif not fresh_collection:
+            self._delete_stale_paragraphs(paragraph_ids)
 
-        # Use enhanced upsert method that handles metadata
-        self.chroma_db_handler.upsert_documents_with_metadata(
-            self.collection,
-            vector_entries,
-            metadatas,
-            ids
-        )
+        # Without the marker the next setup run retries the sources that failed
+        if failed_sources:
+            logging.error(f"Could not load {', '.join(failed_sources)}; not marking the setup as done")
+            return
+
+        with open(marker_path, 'w'):
+            pass
 
         logging.info("Setup completed successfully - ChromaDB is now populated with legal text content")
 
-    def runQuestion(self, query_text: str) -> str:
-        """Process a user question by querying the database and LLM."""
-        if not self.collection:
-            self.collection = self.chroma_db_handler.get_or_create_collection(self.config.chroma_collection_name)
+    def _delete_stale_paragraphs(self, paragraph_ids: Set[str]):
+        """Delete stored text file paragraphs that no longer occur in any text file."""
+        stored_ids = self.collection.get(where={"source": "text_file"}, include=[])['ids']
+        stale_ids = [doc_id for doc_id in stored_ids if doc_id not in paragraph_ids]
+        for batch in _batched(stale_ids, INGEST_BATCH_SIZE):
+            self.collection.delete(ids=batch)
+        if stale_ids:
+            logging.info(f"Deleted {len(stale_ids)} paragraphs that no longer occur in the text files")
+
+    def _retrieve(self, query_text: str) -> Tuple[np.ndarray, Optional[str], Optional[str]]:
+        """Embed the question and look it up; returns (query embedding, ready answer, LLM context)."""
+        query_embedding = self.chroma_db_handler.embed([query_text])
+        cached_answer = self.semantic_cache.get(query_embedding[0])
+        if cached_answer is not None:
+            logging.info("Answering from semantic cache")
+            return query_embedding, cached_answer, None
 
         logging.info(f"Querying ChromaDB for: '{query_text[:50]}...' if len > 50")
-        query_result = self.chroma_db_handler.query_documents(self.collection, query_text, n_results=5)
+        query_result = self.chroma_db_handler.query_documents(
+            self.collection, query_text, n_results=5, query_embeddings=query_embedding
+        )
 
         # DIAGNOSTIC CODE
         # print("=== DEBUG INFO ===")
@@ -120,53 +372,92 @@ class Application:
 
         if not query_result['documents'][0]:
             logging.warning("No relevant documents found for the query")
-            return "I couldn't find relevant information to answer your question."
+            return query_embedding, "I couldn't find relevant information to answer your question.", None
 
         context = '\n\n'.join(query_result['documents'][0])
 
         # Extract metadata for context - FIXED VERSION
         metadata_context = ""
         if query_result.get('metadatas') and query_result['metadatas'][0]:
-            law_sources = []
-            for meta in query_result['metadatas'][0]:
+            # dict keys deduplicate the sources in a single pass while keeping result order
+            law_sources = dict.fromkeys(
+                f"Law {meta['law_number']} - {meta.get('title', '')}" if meta.get('law_number') else f"Source: {meta['url']}"
+                for meta in query_result['metadatas'][0]
                 # Check if meta is not None before calling .get()
-                if meta is not None:
-                    if meta.get('law_number'):
-                        law_sources.append(f"Law {meta['law_number']} - {meta.get('title', '')}")
-                    elif meta.get('url'):
-                        law_sources.append(f"Source: {meta['url']}")
+                if meta is not None and (meta.get('law_number') or meta.get('url'))
+            )
 
             if law_sources:
-                metadata_context = f"\n\nSources: {'; '.join(set(law_sources))}"
+                metadata_context = "\n\nSources: " + "; ".join(law_sources)
+
+        return query_embedding, None, context + metadata_context
+
+    def runQuestion(self, query_text: str) -> str:
+        """Process a user question by querying the database and LLM."""
+        query_embedding, answer, context = self._retrieve(query_text)
+        if answer is not None:
+            return answer
 
         logging.info("Generating answer using LLM...")
-        return self.get_answer_from_llm(context + metadata_context, query_text)
+        answer = self.get_answer_from_llm(context, query_text)
+        self.semantic_cache.put(query_embedding[0], answer)
+        return answer
+
+    async def run_question_async(self, query_text: str) -> str:
+        """Async variant of runQuestion; embedding and ChromaDB lookups run in a worker thread."""
+        query_embedding, answer, context = await asyncio.to_thread(self._retrieve, query_text)
+        if answer is not None:
+            return answer
+
+        logging.info("Generating answer using LLM...")
+        answer = await self.get_answer_from_llm_async(context, query_text)
+        self.semantic_cache.put(query_embedding[0], answer)
+        return answer
+
+    async def run_question_stream(self, query_text: str) -> AsyncIterator[str]:
+        """Like run_question_async, but yields the answer as it is generated, without the <think> block."""
+        query_embedding, answer, context = await asyncio.to_thread(self._retrieve, query_text)
+        if answer is not None:
+            yield answer
+            return
+
+        logging.info("Streaming answer from LLM...")
+        think_filter = _ThinkTagFilter()
+        parts = []
+        async for chunk in self.ollama_client.stream(self._llm_messages(context, query_text)):
+            text = think_filter.feed(chunk)
+            if not parts:
+                text = text.lstrip()
+            if text:
+                parts.append(text)
+                yield text
+
+        remainder = think_filter.flush().rstrip()
+        if remainder:
+            parts.append(remainder)
+            yield remainder
+
+        self.semantic_cache.put(query_embedding[0], ''.join(parts).strip())
+
+    def _llm_messages(self, context: str, question: str) -> List[Dict]:
+        user_prompt = PROMPT_HEAD + question + PROMPT_MID + context + PROMPT_TAIL
+        return [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': user_prompt}
+        ]
 
     def get_answer_from_llm(self, context: str, question: str) -> str:
         """Query the LLM with the given context and question."""
-        llm_prompt = (
-            "You are an AI Legal Counsel with expertise in Austrian law and all areas of law. "
-            "You provide precise, accurate legal analysis and advice based on the information provided. "
-            "\n\nAs legal counsel, you should:"
-            "\n- Analyze legal questions methodically and thoroughly"
-            "\n- Consider relevant statutes, case law, and legal principles from the provided context"
-            "\n- Reference specific law numbers and sections when citing Austrian laws"
-            "\n- Clearly distinguish between established legal facts and your professional opinion"
-            "\n- Include appropriate disclaimers about not providing formal legal advice"
-            "\n- Use proper legal terminology and citation formats when referencing legal sources"
-            "\n- Identify potential legal risks and considerations"
-            "\n- When citing Austrian laws, reference the specific BGBl numbers if available"
-            "\n\nQuestion: {question}"
-            "\n\nRelevant Information: {context}"
-            "\n\nProvide your analysis and advice:"
-        ).format(question=question, context=context)
-
-        response = chat(
-            model='deepseek-r1:8b',
-            messages=[{'role': 'user', 'content': llm_prompt}]
-        )
+        response = self.ollama_client.chat_sync(self._llm_messages(context, question))
+
+        # Remove any thinking tokens if present
+        cleaned_response = _THINK_RE.sub('', response)
+        return cleaned_response.strip()
+
+    async def get_answer_from_llm_async(self, context: str, question: str) -> str:
+        """Async variant of get_answer_from_llm that awaits the Ollama client without blocking a thread."""
+        response = await asyncio.wrap_future(self.ollama_client.submit(self._llm_messages(context, question)))
 
         # Remove any thinking tokens if present
-        import re
-        cleaned_response = re.sub(r'<think>.*?</think>', '', response.message.content, flags=re.DOTALL)
-        return cleaned_response.strip()
\ No newline at end of file
+        cleaned_response = _THINK_RE.sub('', response)
+        return cleaned_response.strip()
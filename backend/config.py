@@ -1,12 +1,21 @@
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
 class AppConfig:
     chroma_path: str
     chroma_collection_name: str
+    chroma_memory_limit_bytes: int = 4 * 1024 ** 3
+    embedding_model: str = "BAAI/bge-small-en-v1.5"
+    llm_model: str = "deepseek-r1:8b"
+    llm_options: dict = field(default_factory=lambda: {
+        "num_ctx": 8192,
+        "num_keep": 512,
+        "num_predict": 2048,
+        "temperature": 0.2
+    })
 
 
 def load_config(path: str) -> AppConfig:
@@ -1,7 +1,27 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import sys
 import os
+
+# One BLAS/OpenMP thread per worker process; scale with uvicorn workers instead of letting
+# every worker spawn cpu_count() threads that compete for the same cores.
+# Must be set before numpy/torch are imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import torch
+
+torch.set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+torch.set_num_interop_threads(1)
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+import orjson
+import asyncio
+import sys
 import logging
 
 # Ensure the project root is in the Python path
@@ -11,10 +31,6 @@ from app import Application
 from services.chroma_db_handler import ChromaDBHandler
 from config import load_config
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-CORS(app, origins=["http://localhost:3000"])
-
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,38 +44,134 @@ logging.basicConfig(
 # Initialize the application
 config_data = load_config("./resources/config.json")
 chroma_db_handler = ChromaDBHandler(config_data)
-legal_app = Application(config_data, chroma_db_handler)
+legal_app = Application(config_data, chroma_db_handler, read_only=True)
 
-# Ensure the database is set up
-legal_app.runSetup()
 
-@app.route('/api/ask-legal-question', methods=['POST'])
-def ask_legal_question():
+def _check_collection():
+    """Raise unless the collection has been populated by the setup with the configured embedding model."""
     try:
-        # Get the question from the request
-        data = request.json
-        question = data.get('question', '')
+        document_count = legal_app.collection.count()
+    except Exception as e:
+        raise RuntimeError(
+            f"ChromaDB collection '{config_data.chroma_collection_name}' cannot be opened ({e}), run `python main.py setup` first"
+        ) from e
+
+    if document_count == 0:
+        raise RuntimeError(
+            f"ChromaDB collection '{config_data.chroma_collection_name}' is empty, run `python main.py setup` first"
+        )
+
+    # Queries must be embedded with the model the stored documents were embedded with
+    legal_app.check_embedding_model()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # The database is populated by `python main.py setup`; refuse to serve without it. A worker that had
+    # loaded an empty index would not pick up documents written later by the setup process.
+    await asyncio.to_thread(_check_collection)
+    yield
+
+
+class ORJSONRequest(Request):
+    """Request that parses JSON bodies with orjson instead of the json module."""
+
+    async def json(self):
+        if not hasattr(self, '_json'):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
 
-        if not question:
-            return jsonify({
-                'error': 'No question provided',
-                'answer': 'Please ask a specific legal question.'
-            }), 400
+# Encode responses and decode request bodies with orjson
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.router.route_class = ORJSONRoute
+app.add_middleware(
+    CORSMiddleware,  # Enable CORS for all routes
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"]
+)
+
+
+class QuestionRequest(BaseModel):
+    question: str = ''
+
+
+@app.get('/healthz')
+async def healthz():
+    # Chroma calls block, keep them off the event loop
+    document_count = await asyncio.to_thread(legal_app.collection.count)
+    return {'status': 'ok', 'documents': document_count}
 
+
+@app.post('/api/ask-legal-question')
+async def ask_legal_question(request: QuestionRequest):
+    question = request.question
+
+    if not question:
+        return ORJSONResponse({
+            'error': 'No question provided',
+            'answer': 'Please ask a specific legal question.'
+        }, status_code=400)
+
+    try:
         # Use the existing application method to get an answer
-        answer = legal_app.runQuestion(question)
+        answer = await legal_app.run_question_async(question)
 
-        return jsonify({
+        return {
             'question': question,
             'answer': answer
-        })
+        }
 
     except Exception as e:
         logging.error(f"Error processing question: {str(e)}")
-        return jsonify({
+        return ORJSONResponse({
+            'error': 'An error occurred while processing your question',
+            'answer': 'Sorry, I encountered an error. Please try again.'
+        }, status_code=500)
+
+
+async def _answer_events(question: str):
+    """Server-sent events carrying the answer as it is generated."""
+    try:
+        async for delta in legal_app.run_question_stream(question):
+            yield b"data: " + orjson.dumps({'delta': delta}) + b"\n\n"
+        yield b"event: done\ndata: {}\n\n"
+
+    except Exception as e:
+        logging.error(f"Error streaming answer: {str(e)}")
+        yield b"event: error\ndata: " + orjson.dumps({
             'error': 'An error occurred while processing your question',
             'answer': 'Sorry, I encountered an error. Please try again.'
-        }), 500
+        }) + b"\n\n"
+
+
+@app.post('/api/ask-legal-question/stream')
+async def ask_legal_question_stream(request: QuestionRequest):
+    question = request.question
+
+    if not question:
+        return ORJSONResponse({
+            'error': 'No question provided',
+            'answer': 'Please ask a specific legal question.'
+        }, status_code=400)
+
+    return StreamingResponse(
+        _answer_events(question),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run(app, port=5000)
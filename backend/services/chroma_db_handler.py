@@ -1,19 +1,77 @@
 import chromadb
-import uuid
 import json
 import os
+import numpy as np
+import torch
 from typing import List, Dict, Optional
+from blake3 import blake3
+from chromadb.config import Settings
+from sentence_transformers import SentenceTransformer
 from config import AppConfig
 
+
+# Number of documents sent to Chroma per request
+BATCH_SIZE = 1000
+
+# HNSW settings applied when a collection is created; the index is synced to disk every ten write batches
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+    "hnsw:batch_size": BATCH_SIZE,
+    "hnsw:sync_threshold": 10 * BATCH_SIZE
+}
+
+
+def content_id(document: str) -> str:
+    """Deterministic ID derived from the document text, so re-ingesting a paragraph updates it in place"""
+    return blake3(document.encode('utf-8')).hexdigest()[:32]
+
+
 class ChromaDBHandler:
     def __init__(self, config_data: AppConfig):
         self.config = config_data
-        self.client = chromadb.PersistentClient(path=self.get_path(self.config.chroma_path))
+        chroma_path = self.get_path(self.config.chroma_path)
+        self.client = chromadb.PersistentClient(
+            path=chroma_path,
+            settings=Settings(
+                anonymized_telemetry=False,
+                is_persistent=True,
+                persist_directory=chroma_path,
+                # Keep only recently used segments (HNSW indexes) loaded, within the configured memory budget
+                chroma_segment_cache_policy="LRU",
+                chroma_memory_limit_bytes=self.config.chroma_memory_limit_bytes
+            )
+        )
+
+        # Keep the embedding model resident so queries don't pay for model init
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.model = SentenceTransformer(self.config.embedding_model, device=device)
+        if device == 'cuda':
+            self.model.half()
 
-    def get_or_create_collection(self, collection_name: str) -> chromadb.Collection:
-        collection = self.client.get_or_create_collection(name=collection_name)
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into normalized embeddings with the resident model"""
+        with torch.inference_mode():
+            return self.model.encode(
+                texts,
+                batch_size=64,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+
+    def get_or_create_collection(self, collection_name: str, metadata: Optional[Dict] = None) -> chromadb.Collection:
+        # The metadata only applies on creation; an existing collection keeps the settings and embedding model it was built with
+        if metadata is None:
+            metadata = {**HNSW_METADATA, "embedding_model": self.config.embedding_model}
+        collection = self.client.get_or_create_collection(name=collection_name, metadata=metadata)
         return collection
 
+    def get_collection(self, collection_name: str) -> chromadb.Collection:
+        """Open an existing collection without creating it"""
+        return self.client.get_collection(name=collection_name)
+
     def get_path(self, relative_path: str) -> str:
         base_path = os.path.dirname(os.path.abspath(__file__))
         return os.path.join(base_path, relative_path)
@@ -24,23 +82,57 @@ class ChromaDBHandler:
 
     def upsert_documents(self, collection: chromadb.Collection, documents: list):
         """Original method for backward compatibility"""
-        ids = [str(uuid.uuid4()) for _ in documents]
-        collection.upsert(documents=documents, ids=ids)
+        # Identical documents share an ID, and Chroma rejects duplicate IDs within one request
+        unique = {content_id(document): document for document in documents}
+        documents = list(unique.values())
+        collection.upsert(documents=documents, embeddings=self.embed(documents).tolist(), ids=list(unique.keys()))
 
     def upsert_documents_with_metadata(
             self,
             collection: chromadb.Collection,
             documents: List[str],
             metadatas: Optional[List[Dict]] = None,
-            ids: Optional[List[str]] = None
+            ids: Optional[List[str]] = None,
+            embeddings: Optional[np.ndarray] = None
+    ):
+        """Enhanced method that supports metadata, custom IDs and precomputed embeddings"""
+        count = self._write_documents(collection, collection.upsert, documents, metadatas, ids, embeddings)
+        print(f"Upserted {count} documents to collection")
+
+    def add_documents_with_metadata(
+            self,
+            collection: chromadb.Collection,
+            documents: List[str],
+            metadatas: Optional[List[Dict]] = None,
+            ids: Optional[List[str]] = None,
+            embeddings: Optional[np.ndarray] = None
     ):
-        """Enhanced method that supports metadata and custom IDs"""
+        """Like upsert_documents_with_metadata, but skips Chroma's per-ID existence check; meant for empty collections"""
+        count = self._write_documents(collection, collection.add, documents, metadatas, ids, embeddings)
+        print(f"Added {count} documents to collection")
+
+    def stored_content_ids(self, collection: chromadb.Collection, ids: List[str]) -> Dict[str, Optional[str]]:
+        """Map the given ids that are already stored to the content_id recorded in their metadata"""
+        # Chroma rejects duplicate IDs, and identical paragraphs share one
+        stored = collection.get(ids=list(dict.fromkeys(ids)), include=["metadatas"])
+        return {doc_id: (meta or {}).get("content_id") for doc_id, meta in zip(stored['ids'], stored['metadatas'])}
+
+    def _write_documents(
+            self,
+            collection: chromadb.Collection,
+            write,
+            documents: List[str],
+            metadatas: Optional[List[Dict]],
+            ids: Optional[List[str]],
+            embeddings: Optional[np.ndarray]
+    ) -> int:
+        """Write documents in batches with the given collection method and return how many were written"""
         if not documents:
-            return
+            return 0
 
         # Generate IDs if not provided
         if not ids:
-            ids = [str(uuid.uuid4()) for _ in documents]
+            ids = [content_id(document) for document in documents]
 
         # Create empty metadata if not provided
         if not metadatas:
@@ -51,31 +143,59 @@ class ChromaDBHandler:
         documents = documents[:min_length]
         metadatas = metadatas[:min_length]
         ids = ids[:min_length]
+        if embeddings is not None:
+            embeddings = embeddings[:min_length]
+
+        # Chroma rejects duplicate IDs within one request, keep the first occurrence of each
+        first_index = {}
+        for index, doc_id in enumerate(ids):
+            first_index.setdefault(doc_id, index)
+        if len(first_index) < len(ids):
+            keep = list(first_index.values())
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            ids = [ids[i] for i in keep]
+            if embeddings is not None:
+                embeddings = embeddings[keep]
 
-        # Batch upsert to avoid memory issues with large datasets
-        batch_size = 1000
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i + batch_size]
-            batch_meta = metadatas[i:i + batch_size]
-            batch_ids = ids[i:i + batch_size]
+        # Write in batches to avoid memory issues with large datasets
+        written = 0
+        for i in range(0, len(documents), BATCH_SIZE):
+            batch_docs = documents[i:i + BATCH_SIZE]
+            batch_meta = metadatas[i:i + BATCH_SIZE]
+            batch_ids = ids[i:i + BATCH_SIZE]
+            batch_emb = embeddings[i:i + BATCH_SIZE] if embeddings is not None else None
 
-            collection.upsert(
+            if batch_emb is None:
+                batch_emb = self.embed(batch_docs)
+
+            write(
                 documents=batch_docs,
+                embeddings=batch_emb.tolist(),
                 metadatas=batch_meta,
                 ids=batch_ids
             )
+            written += len(batch_ids)
 
-        print(f"Upserted {len(documents)} documents to collection")
+        return written
 
-    def query_documents(self, collection: chromadb.Collection, query_text: str, n_results: int) -> chromadb.QueryResult:
-        """Query documents with support for both string and list query_texts"""
-        if isinstance(query_text, str):
-            query_texts = [query_text]
-        else:
-            query_texts = query_text
+    def query_documents(
+            self,
+            collection: chromadb.Collection,
+            query_text: str,
+            n_results: int,
+            query_embeddings: Optional[np.ndarray] = None
+    ) -> chromadb.QueryResult:
+        """Query documents with support for both string and list query_texts, or precomputed query embeddings"""
+        if query_embeddings is None:
+            if isinstance(query_text, str):
+                query_texts = [query_text]
+            else:
+                query_texts = query_text
+            query_embeddings = self.embed(query_texts)
 
         return collection.query(
-            query_texts=query_texts,
+            query_embeddings=query_embeddings.tolist(),
             n_results=n_results,
             include=["documents", "metadatas", "distances"]
         )
@@ -94,7 +214,7 @@ class ChromaDBHandler:
             query_texts = query_text
 
         query_params = {
-            "query_texts": query_texts,
+            "query_embeddings": self.embed(query_texts).tolist(),
             "n_results": n_results,
             "include": ["documents", "metadatas", "distances"]
         }
@@ -147,7 +267,8 @@ class ChromaDBHandler:
         """List all collections"""
         try:
             collections = self.client.list_collections()
-            return [col.name for col in collections]
+            # Chroma 0.6 returns collection names, earlier versions return collection objects
+            return [col if isinstance(col, str) else col.name for col in collections]
         except Exception as e:
             print(f"Error listing collections: {e}")
             return []
\ No newline at end of file
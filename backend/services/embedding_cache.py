@@ -0,0 +1,39 @@
+import sqlite3
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+# SQLite limits the number of bound parameters per statement
+_MAX_QUERY_PARAMS = 900
+
+
+class EmbeddingCache:
+    """On-disk cache mapping paragraph hashes to their embedding vectors"""
+
+    def __init__(self, path: str):
+        # The ingestion pipeline uses the cache from worker threads, one call at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, vec BLOB)")
+
+    def get_many(self, hashes: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return the cached embeddings for all hashes that are present"""
+        found = {}
+        for i in range(0, len(hashes), _MAX_QUERY_PARAMS):
+            chunk = hashes[i:i + _MAX_QUERY_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT hash, vec FROM embeddings WHERE hash IN ({placeholders})", chunk
+            )
+            for h, vec in rows:
+                found[h] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]):
+        """Store embeddings, replacing existing entries with the same hash"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)",
+            ((h, np.asarray(vec, dtype=np.float32).tobytes()) for h, vec in items)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,120 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import httpx
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+
+def _ollama_base_url() -> str:
+    host = os.environ.get("OLLAMA_HOST", "localhost:11434")
+    return host if "://" in host else f"http://{host}"
+
+
+class OllamaClient:
+    """Chat client for Ollama's /api/chat with at most max_concurrency requests in flight.
+
+    The limit matches Ollama's parallel slots (OLLAMA_NUM_PARALLEL), so further requests wait
+    here instead of in Ollama's queue. Identical prompts that are in flight share a single
+    generation. The client owns an asyncio loop on a background thread, so it can be used from
+    synchronous callers via chat_sync().
+    """
+
+    def __init__(
+            self,
+            model: str,
+            options: Optional[Dict] = None,
+            max_concurrency: Optional[int] = None,
+            keep_alive: Union[str, int] = -1,
+            timeout_seconds: float = 600
+    ):
+        self.model = model
+        self.options = options or {}
+        self.max_concurrency = max_concurrency or int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+        self.keep_alive = keep_alive
+        self.timeout_seconds = timeout_seconds
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ollama-client", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    async def _start(self):
+        self._client = httpx.AsyncClient(base_url=_ollama_base_url(), timeout=self.timeout_seconds)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        # Running generations by prompt, so concurrent identical questions are answered once
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def chat(self, messages: List[Dict]) -> str:
+        """Send a chat request and wait for its answer; must run on the client's loop"""
+        key = json.dumps(messages, sort_keys=True)
+        generation = self._in_flight.get(key)
+        if generation is None:
+            generation = asyncio.create_task(self._generate(messages))
+            self._in_flight[key] = generation
+            generation.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # A caller that gives up must not cancel the generation other callers are waiting for
+        return await asyncio.shield(generation)
+
+    def submit(self, messages: List[Dict]) -> concurrent.futures.Future:
+        """Send a chat request from any thread"""
+        return asyncio.run_coroutine_threadsafe(self.chat(messages), self._loop)
+
+    def chat_sync(self, messages: List[Dict]) -> str:
+        """Send a chat request and block until its answer is available"""
+        return self.submit(messages).result()
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Stream the answer of a chat request chunk by chunk; usable from any event loop.
+
+        Streamed requests are not shared with other callers, but take a slot like any other request.
+        """
+        caller_loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        def hand_over(item):
+            caller_loop.call_soon_threadsafe(chunks.put_nowait, item)
+
+        async def produce():
+            try:
+                async with self._slots, self._client.stream("POST", "/api/chat", json={
+                    "model": self.model,
+                    "messages": messages,
+                    "stream": True,
+                    "options": self.options,
+                    "keep_alive": self.keep_alive
+                }) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line:
+                            content = json.loads(line).get("message", {}).get("content")
+                            if content:
+                                hand_over(content)
+                hand_over(finished)
+            except Exception as e:
+                hand_over(e)
+
+        production = asyncio.run_coroutine_threadsafe(produce(), self._loop)
+        try:
+            while (chunk := await chunks.get()) is not finished:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # Stops generation in Ollama when the consumer goes away early
+            production.cancel()
+
+    async def _generate(self, messages: List[Dict]) -> str:
+        async with self._slots:
+            response = await self._client.post("/api/chat", json={
+                "model": self.model,
+                "messages": messages,
+                "stream": False,
+                "options": self.options,
+                "keep_alive": self.keep_alive
+            })
+        response.raise_for_status()
+        return response.json()["message"]["content"]
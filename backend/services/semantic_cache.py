@@ -0,0 +1,81 @@
+import itertools
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class SemanticCache:
+    """LRU cache of answers looked up by query embedding similarity.
+
+    Query embeddings are hashed with random-projection LSH into several bands;
+    a cached answer is returned when any band matches and the cosine similarity
+    of the (normalized) embeddings reaches the threshold.
+    """
+
+    def __init__(
+            self,
+            dim: int,
+            n_bits: int = 64,
+            n_bands: int = 8,
+            threshold: float = 0.95,
+            max_size: int = 1024,
+            ttl_seconds: float = 3600,
+            seed: Optional[int] = None
+    ):
+        # A single 64-bit signature almost never matches for paraphrases, so the bits are split into bands
+        self.planes = np.random.default_rng(seed).standard_normal((n_bits, dim)).astype(np.float32)
+        self.n_bands = n_bands
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[int, Tuple[List[bytes], np.ndarray, str, float]]" = OrderedDict()
+        self._buckets: Dict[bytes, List[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _band_keys(self, embedding: np.ndarray) -> List[bytes]:
+        bits = (self.planes @ embedding) > 0
+        return [bytes([band]) + np.packbits(chunk).tobytes()
+                for band, chunk in enumerate(np.array_split(bits, self.n_bands))]
+
+    def _remove(self, entry_id: int):
+        keys = self._entries.pop(entry_id)[0]
+        for key in keys:
+            bucket = self._buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def get(self, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached answer for a sufficiently similar query, if any"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        keys = self._band_keys(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = {entry_id for key in keys for entry_id in self._buckets.get(key, ())}
+            for entry_id in candidates:
+                _, cached_embedding, answer, created = self._entries[entry_id]
+                if now - created > self.ttl_seconds:
+                    self._remove(entry_id)
+                elif float(cached_embedding @ embedding) >= self.threshold:
+                    self._entries.move_to_end(entry_id)
+                    return answer
+        return None
+
+    def put(self, embedding: np.ndarray, answer: str):
+        """Cache an answer, evicting the least recently used entries when full"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        keys = self._band_keys(embedding)
+
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (keys, embedding, answer, time.monotonic())
+            for key in keys:
+                self._buckets.setdefault(key, []).append(entry_id)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
@@ -0,0 +1,39 @@
+import logging
+import mmap
+import os
+import re
+from typing import Iterator, List, Optional
+
+# Blank lines (optionally containing whitespace or \r) separate paragraphs in text files
+_PARAGRAPH_SEPARATOR_RE = re.compile(rb'\n\s*\n')
+
+
+def split_paragraphs(buffer) -> Iterator[bytes]:
+    """Lazily yield the raw paragraphs of a bytes-like buffer."""
+    start = 0
+    for separator in _PARAGRAPH_SEPARATOR_RE.finditer(buffer):
+        yield buffer[start:separator.start()]
+        start = separator.end()
+    yield buffer[start:]
+
+
+def load_text_file(file_path: str) -> Optional[List[str]]:
+    """Load a text file and return its paragraphs, or None if it cannot be read.
+
+    Runs in setup worker processes, so this module stays import-light.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            # mmap cannot map empty files
+            if os.fstat(file.fileno()).st_size == 0:
+                return []
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Decode each paragraph once, straight from the mapped bytes, instead of reading the whole file into a str
+                paragraphs = [text for part in split_paragraphs(mm) if (text := part.decode('utf-8').strip())]
+
+        logging.info(f"Loaded {len(paragraphs)} paragraphs from {file_path}")
+        return paragraphs
+    except Exception as e:
+        logging.error(f"Error loading {file_path}: {e}")
+        return None
@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, Menu, FileText, Briefcase, Calculator, User, Bot } from 'lucide-react';
 import ReactMarkdown from 'react-markdown';
-import { askLegalQuestion } from '../services/apiService';
+import { streamLegalQuestion } from '../services/apiService';
 import '../index.css';
 
 const LegalAdviserChat = () => {
@@ -36,17 +36,19 @@ const LegalAdviserChat = () => {
         setInputMessage('');
         setIsLoading(true);
 
+        // Placeholder bot message that is filled in as the answer streams in
+        const updateBotMessage = (text) => {
+            setMessages(prevMessages => [...prevMessages.slice(0, -1), { text, sender: 'bot' }]);
+        };
+        setMessages(prevMessages => [...prevMessages, { text: "*Analyzing your question...*", sender: 'bot' }]);
+
         try {
-            const response = await askLegalQuestion(inputMessage);
-            setMessages(prevMessages => [...prevMessages, {
-                text: response.answer || "**I apologize**, but I couldn't find a specific answer to your question. Please consult with a legal professional for personalized advice.",
-                sender: 'bot'
-            }]);
+            const answer = await streamLegalQuestion(inputMessage, updateBotMessage);
+            if (!answer) {
+                updateBotMessage("**I apologize**, but I couldn't find a specific answer to your question. Please consult with a legal professional for personalized advice.");
+            }
         } catch (error) {
-            setMessages(prevMessages => [...prevMessages, {
-                text: "**Sorry**, there was an error processing your question. Please try again.",
-                sender: 'bot'
-            }]);
+            updateBotMessage("**Sorry**, there was an error processing your question. Please try again.");
         } finally {
             setIsLoading(false);
         }
@@ -11,3 +11,53 @@ export const askLegalQuestion = async (question) => {
         throw error;
     }
 };
+
+// Streams the answer via server-sent events; onUpdate receives the answer text received so far
+export const streamLegalQuestion = async (question, onUpdate) => {
+    const response = await fetch(`${API_BASE_URL}/api/ask-legal-question/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ question })
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            return answer;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    data += line.slice(5).trim();
+                }
+            }
+
+            if (event === 'done') {
+                return answer;
+            }
+            if (event === 'error') {
+                throw new Error(JSON.parse(data).error);
+            }
+            answer += JSON.parse(data).delta;
+            onUpdate(answer);
+        }
+    }
+};
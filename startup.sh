@@ -7,8 +7,17 @@ source venv/bin/activate
 # Install requirements
 pip install -r requirements.txt
 
-# Run Flask backend in the background
-python flask_backend.py &
+# Let Ollama serve several requests at once and keep the model loaded between them
+# (only takes effect if the Ollama server is started from this environment)
+export OLLAMA_NUM_PARALLEL=4
+export OLLAMA_KEEP_ALIVE=-1
+
+# Populate ChromaDB once before serving; returns immediately when it is already set up
+(cd backend && python main.py setup) || exit
+
+# Run the backend in the background; each worker pins torch/BLAS to one thread,
+# so scale CPU-bound embedding with the number of workers
+(cd backend && exec uvicorn flask_backend:app --host 127.0.0.1 --port 5000 --workers "${LEGALMIND_WEB_WORKERS:-2}" --loop uvloop) &
 FLASK_PID=$!
 
 # Run React frontend (assuming you've set up a React project)
@@ -16,4 +25,4 @@ cd frontend || exit
 npm start
 
 # Wait for any process to exit
-wait $FLASK_PID
\ No newline at end of file
+wait $FLASK_PID